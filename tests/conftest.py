@@ -0,0 +1,153 @@
+import hashlib
+import http.server
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import pytest
+
+# CMAM_ROOT is fixed when cmam is imported, so point it at a scratch directory first.
+os.environ["CMAM_HOME"] = tempfile.mkdtemp(prefix="cmam-tests-")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import cmam  # noqa: E402
+
+
+def reset_cmam():
+    """Close the registry, empty CMAM_HOME and forget the process-wide state."""
+    if cmam._registry is not None:
+        cmam._registry.close()
+    cmam._registry = None
+    cmam._registry_depth = 0
+    cmam._packages_json_stale = False
+    cmam._config_cache = None
+    cmam._rate_limit_state = None
+    cmam._rate_limit_dirty = False
+    cmam._json_memo.clear()
+    cmam._json_memo_ttl = 0
+    cmam._offline = False
+    cmam._offline_reported_age = None
+    cmam._graphql_has_digest = None
+    shutil.rmtree(cmam.CMAM_ROOT, ignore_errors=True)
+    os.makedirs(cmam.CMAM_ROOT)
+
+
+@pytest.fixture(autouse=True)
+def cmam_home(monkeypatch):
+    """A fresh, empty CMAM_HOME for every test."""
+    for name in list(os.environ):
+        if (name.startswith("CMAM_") and name != "CMAM_HOME") or name in ("GITHUB_TOKEN", "GH_TOKEN"):
+            monkeypatch.delenv(name)
+    reset_cmam()
+    yield cmam.CMAM_ROOT
+    reset_cmam()
+
+
+class FakeServer:
+    """Local HTTP server standing in for GitHub.
+
+    files are served with an ETag and honour Range requests; documents are
+    JSON answered with an ETag and 304s; responses holds canned replies per
+    path, used in order (the last one repeats); graphql, if set, turns a query
+    into the "data" of a POST /graphql reply. Bodies are sent in 1 MiB chunks,
+    chunk_delay seconds apart. clients collects the (host, port) of every
+    connection that sent a request.
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.documents = {}
+        self.graphql = None
+        self.chunk_delay = 0.0
+        self.responses = {}
+        self.requests = []
+        self.clients = set()
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                server.requests.append((self.path, dict(self.headers)))
+                server.clients.add(self.client_address)
+                if self.path == "/graphql" and server.graphql and self.command == "POST":
+                    data = server.graphql(json.loads(body)["query"])
+                    self.reply(200, {"Content-Type": "application/json"}, json.dumps({"data": data}).encode())
+                elif self.path in server.responses:
+                    replies = server.responses[self.path]
+                    status, headers, body = replies.pop(0) if len(replies) > 1 else replies[0]
+                    self.reply(status, headers, body, server.chunk_delay)
+                elif self.path in server.documents:
+                    document = json.dumps(server.documents[self.path]).encode()
+                    etag = '"' + hashlib.sha256(document).hexdigest()[:16] + '"'
+                    if self.headers.get("If-None-Match") == etag:
+                        self.reply(304, {"ETag": etag}, b"")
+                    else:
+                        self.reply(200, {"ETag": etag, "Content-Type": "application/json"}, document)
+                elif self.path in server.files:
+                    self.send_file(server.files[self.path])
+                else:
+                    self.reply(404, {}, b'{"message": "Not Found"}')
+
+            do_POST = do_GET
+
+            def send_file(self, data):
+                etag = '"' + hashlib.sha256(data).hexdigest()[:16] + '"'
+                headers = {"ETag": etag, "Accept-Ranges": "bytes"}
+                requested = self.headers.get("Range", "")
+                if requested.startswith("bytes=") and self.headers.get("If-Range", etag) == etag:
+                    start, _, end = requested[6:].partition("-")
+                    start, end = int(start), min(int(end or len(data) - 1), len(data) - 1)
+                    headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+                    self.reply(206, headers, data[start:end + 1], server.chunk_delay)
+                else:
+                    self.reply(200, headers, data, server.chunk_delay)
+
+            def reply(self, status, headers, body, chunk_delay=0.0):
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                for start in range(0, len(body), 1 << 20):
+                    self.wfile.write(body[start:start + (1 << 20)])
+                    time.sleep(chunk_delay)
+
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def respond(self, path, status, headers=None, body=b"{}"):
+        self.responses.setdefault(path, []).append((status, headers or {}, body))
+
+    def add_release(self, repo, tag, files, latest=True, digests=True):
+        """Publish {name: bytes} as a release of repo; returns its REST document."""
+        assets = []
+        for name, data in files.items():
+            path = f"/{repo}/releases/download/{tag}/{name}"
+            self.files[path] = data
+            assets.append({
+                "name": name, "browser_download_url": self.url + path, "size": len(data),
+                "digest": "sha256:" + hashlib.sha256(data).hexdigest() if digests else None,
+            })
+        release = {"tag_name": tag, "assets": assets}
+        self.documents[f"/repos/{repo}/releases/tags/{tag}"] = release
+        if latest:
+            self.documents[f"/repos/{repo}/releases/latest"] = release
+        return release
+
+
+@pytest.fixture
+def server():
+    fake = FakeServer()
+    yield fake
+    fake.httpd.shutdown()
+    fake.httpd.server_close()
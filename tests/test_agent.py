@@ -0,0 +1,56 @@
+import os
+import threading
+import time
+from multiprocessing.connection import Client
+
+import pytest
+
+import cmam
+
+
+@pytest.fixture
+def agent():
+    thread = threading.Thread(target=cmam.agent_run, daemon=True)
+    thread.start()
+    deadline = time.time() + 10
+    while not cmam.agent_request({"command": "status"}):
+        assert time.time() < deadline, "the agent did not start"
+        time.sleep(0.05)
+    yield
+    cmam.agent_request({"command": "stop"})
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def connect():
+    with open(cmam.CMAM_AGENT_KEY, "rb") as f:
+        return Client(*cmam.agent_address(), authkey=f.read())
+
+
+def test_commands_are_forwarded_to_the_agent(agent, capsys):
+    assert cmam.forward_to_agent(["list"]) == 0
+    assert "No apps installed" in capsys.readouterr().out
+    assert cmam.agent_request({"command": "status"})["served"] == 1
+
+
+def test_other_commands_run_locally(agent):
+    assert cmam.forward_to_agent(["install", "a"]) is None
+    assert cmam.forward_to_agent(["list", "--help"]) is None
+
+
+def test_a_silent_client_does_not_block_the_agent(agent):
+    with connect():
+        assert cmam.agent_request({"command": "status"})
+
+
+def test_a_different_environment_runs_locally(agent):
+    with connect() as conn:
+        conn.send({"argv": ["list"], "env": {"GITHUB_TOKEN": "someone-else"}, "cwd": os.getcwd()})
+        assert conn.recv() == {"local": True}
+
+
+def test_relative_paths_from_another_directory_run_locally(tmp_path):
+    (tmp_path / "sub").mkdir()
+    env = cmam.forwarded_environment()
+    assert not cmam.runs_differently_here({"argv": ["list"], "env": env, "cwd": str(tmp_path)})
+    assert cmam.runs_differently_here({"argv": ["info", "sub"], "env": env, "cwd": str(tmp_path)})
@@ -0,0 +1,43 @@
+import copy
+import os
+
+import pytest
+from typer.testing import CliRunner
+
+import cmam
+
+
+def test_asset_urls_are_rewritten_onto_asset_base(monkeypatch):
+    url = "https://github.com/o/a/releases/download/v1.0.0/a.exe?raw=1"
+    assert cmam.asset_url(url) == url
+    monkeypatch.setenv("CMAM_ASSET_BASE", "https://mirror.example/gh/")
+    assert cmam.asset_url(url) == "https://mirror.example/gh/o/a/releases/download/v1.0.0/a.exe?raw=1"
+    assert cmam.asset_url(None) is None
+
+
+@pytest.mark.parametrize("url, trusted", [
+    ("https://api.github.com/repos/o/a", True),
+    ("http://api.github.com/repos/o/a", False),
+    ("https://mirror.example/repos/o/a", False),
+    ("https://github.example.com/api/v3/repos/o/a", True),
+])
+def test_token_only_goes_to_trusted_hosts(monkeypatch, url, trusted):
+    monkeypatch.setenv("CMAM_TOKEN_HOSTS", "github.example.com")
+    assert cmam.sends_github_token(url) == trusted
+
+
+def test_install_downloads_from_the_asset_mirror(server, monkeypatch):
+    monkeypatch.setenv("CMAM_API_BASE", server.url)
+    monkeypatch.setenv("CMAM_MANIFEST_URL", server.url + "/raw/packages.json")
+    monkeypatch.setenv("CMAM_ASSET_BASE", server.url + "/mirror")
+    server.documents["/raw/packages.json"] = {"a": {"link": "o/a"}}
+    release = copy.deepcopy(server.add_release("o/a", "v1.0.0", {"a.exe": b"A" * 100}))
+    # Only the mirror has the file; the URL GitHub publishes is unreachable
+    server.files["/mirror/o/a/releases/download/v1.0.0/a.exe"] = server.files.pop("/o/a/releases/download/v1.0.0/a.exe")
+    release["assets"][0]["browser_download_url"] = "http://127.0.0.1:9/o/a/releases/download/v1.0.0/a.exe"
+    server.documents["/repos/o/a/releases/latest"] = release
+
+    result = CliRunner().invoke(cmam.app, ["install", "a"])
+    assert result.exit_code == 0, result.output
+    with open(os.path.join(cmam.CMAM_SCRIPTS, "a.exe"), "rb") as f:
+        assert f.read() == b"A" * 100
@@ -0,0 +1,66 @@
+import hashlib
+import os
+
+from typer.testing import CliRunner
+
+import cmam
+
+
+def digest(data):
+    return "sha256:" + hashlib.sha256(data).hexdigest()
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def test_downloads_are_stored_and_reused_without_a_request(server, cmam_home):
+    data = os.urandom(10_000)
+    server.files["/a.exe"] = data
+    first = os.path.join(cmam_home, "first.exe")
+    cmam.fetch_to_file(server.url + "/a.exe", first, checksum=digest(data), segments=1)
+    assert os.path.exists(cmam.blob_path(digest(data)))
+
+    second = os.path.join(cmam_home, "second.exe")
+    assert cmam.fetch_to_file(server.url + "/a.exe", second, checksum=digest(data), segments=1) == digest(data)
+    assert len(server.requests) == 1
+    with open(second, "rb") as f:
+        assert f.read() == data
+
+
+def test_corrupted_blobs_are_evicted(cmam_home):
+    data = b"release build"
+    source = write(os.path.join(cmam_home, "a.exe"), data)
+    cmam.store_blob(source, digest(data))
+    # An installed hardlink modified in place changes the blob too
+    write(cmam.blob_path(digest(data)), b"tampered")
+
+    assert not cmam.materialize_blob(digest(data), os.path.join(cmam_home, "b.exe"))
+    assert not os.path.exists(cmam.blob_path(digest(data)))
+
+
+def test_clean_keeps_offline_data_unless_asked(cmam_home):
+    exe = write(os.path.join(cmam.CMAM_SCRIPTS, "a.exe"), b"a" * 4096)
+    cmam.record_package("a", "1.0", cmam.package_files("a", []))
+    cmam.store_blob(exe, digest(b"a" * 4096))
+    write(cmam.http_cache_path("https://example.invalid/x"), b"{}")
+    write(cmam.CMAM_PREFETCH_JSON, b"{}")
+    write(cmam.CMAM_RATE_LIMIT_JSON, b"{}")
+    write(os.path.join(cmam.CMAM_CACHE, "leftover.bin"), b"x" * 100)
+
+    result = CliRunner().invoke(cmam.app, ["clean"])
+    assert result.exit_code == 0, result.output
+    assert not os.path.exists(os.path.join(cmam.CMAM_CACHE, "leftover.bin"))
+    for path in (cmam.blob_path(digest(b"a" * 4096)), cmam.http_cache_path("https://example.invalid/x"),
+                 cmam.CMAM_PREFETCH_JSON, cmam.CMAM_RATE_LIMIT_JSON):
+        assert os.path.exists(path)
+
+    result = CliRunner().invoke(cmam.app, ["clean", "--blobs"])
+    assert not os.path.exists(cmam.CMAM_BLOBS)
+    assert not os.path.exists(cmam.CMAM_PREFETCH_JSON)
+    assert os.path.exists(cmam.CMAM_RATE_LIMIT_JSON)
+    # The blob is hardlinked to the installed exe, so only the two 2-byte JSON files count as freed
+    assert "Space freed: 4 B" in result.output
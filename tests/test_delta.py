@@ -0,0 +1,54 @@
+import hashlib
+import os
+import random
+
+import pytest
+
+import cmam
+
+
+def write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def test_delta_round_trip(cmam_home):
+    rng = random.Random(1)
+    old = bytearray(rng.randbytes(2_000_000))
+    new = bytearray(old)
+    new[1000:1000] = b"INSERTED" * 50
+    new[700_000:700_100] = rng.randbytes(100)
+    del new[1_500_000:1_500_333]
+    new += rng.randbytes(5000)
+    source = write(os.path.join(cmam_home, "old"), old)
+    target = write(os.path.join(cmam_home, "new"), new)
+    patch = os.path.join(cmam_home, "patch")
+
+    size = cmam.create_delta(source, target, patch)
+    assert size < 20_000
+    result = os.path.join(cmam_home, "result")
+    assert cmam.apply_delta(source, patch, result) == "sha256:" + hashlib.sha256(new).hexdigest()
+    with open(result, "rb") as f:
+        assert f.read() == new
+
+
+def test_delta_of_unrelated_files_still_applies(cmam_home):
+    source = write(os.path.join(cmam_home, "old"), os.urandom(300_000))
+    target_data = os.urandom(200_000)
+    target = write(os.path.join(cmam_home, "new"), target_data)
+    patch = os.path.join(cmam_home, "patch")
+
+    cmam.create_delta(source, target, patch)
+    result = os.path.join(cmam_home, "result")
+    assert cmam.apply_delta(source, patch, result) == "sha256:" + hashlib.sha256(target_data).hexdigest()
+
+
+def test_delta_rejects_a_different_source(cmam_home):
+    source = write(os.path.join(cmam_home, "old"), os.urandom(100_000))
+    target = write(os.path.join(cmam_home, "new"), os.urandom(100_000))
+    patch = os.path.join(cmam_home, "patch")
+    cmam.create_delta(source, target, patch)
+
+    with pytest.raises(ValueError):
+        cmam.apply_delta(target, patch, os.path.join(cmam_home, "result"))
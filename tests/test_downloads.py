@@ -0,0 +1,68 @@
+import hashlib
+import os
+import threading
+
+import pytest
+import requests
+
+import cmam
+
+
+def test_interrupted_download_resumes_with_a_range_request(server, cmam_home):
+    data = os.urandom(16 << 20)
+    server.files["/a.exe"] = data
+    server.chunk_delay = 0.05
+    checksum = "sha256:" + hashlib.sha256(data).hexdigest()
+    path = os.path.join(cmam_home, "a.exe.tmp")
+
+    cancel = threading.Event()
+    with pytest.raises(InterruptedError):
+        cmam.fetch_to_file(server.url + "/a.exe", path, on_progress=lambda advance, total: advance and cancel.set(),
+                           cancel=cancel, checksum=checksum, segments=1)
+    partial = os.path.getsize(path)
+    assert 0 < partial < len(data)
+    assert os.path.exists(path + ".resume")
+
+    assert cmam.fetch_to_file(server.url + "/a.exe", path, checksum=checksum, segments=1) == checksum
+    headers = server.requests[-1][1]
+    assert headers["Range"] == f"bytes={partial}-"
+    assert headers["If-Range"]
+    with open(path, "rb") as f:
+        assert f.read() == data
+    assert not os.path.exists(path + ".resume")
+
+
+def test_no_resume_sidecar_without_a_validator(server, cmam_home):
+    # Without an ETag, Last-Modified or expected checksum there is nothing to validate a resume against
+    server.respond("/a.exe", 200, {}, os.urandom(16 << 20))
+    server.chunk_delay = 0.05
+    path = os.path.join(cmam_home, "a.exe.tmp")
+
+    cancel = threading.Event()
+    with pytest.raises(InterruptedError):
+        cmam.fetch_to_file(server.url + "/a.exe", path, on_progress=lambda advance, total: advance and cancel.set(),
+                           cancel=cancel, segments=1)
+    assert not os.path.exists(path + ".resume")
+
+
+def test_segmented_download_fetches_the_ranges_in_parallel(server, cmam_home):
+    data = os.urandom(4 << 20)
+    server.files["/a.exe"] = data
+    path = os.path.join(cmam_home, "a.exe.tmp")
+
+    checksum = cmam.fetch_to_file(server.url + "/a.exe", path, segments=4)
+    assert checksum == "sha256:" + hashlib.sha256(data).hexdigest()
+    with open(path, "rb") as f:
+        assert f.read() == data
+    # The first segment reuses the plain GET; the other three are ranges
+    ranges = sorted(headers["Range"] for path, headers in server.requests if "Range" in headers)
+    assert ranges == ["bytes=1048576-2097151", "bytes=2097152-3145727", "bytes=3145728-4194303"]
+
+
+def test_segmented_download_fails_when_ranges_are_ignored(server, cmam_home):
+    server.respond("/a.exe", 200, {"Accept-Ranges": "bytes"}, os.urandom(4 << 20))
+    path = os.path.join(cmam_home, "a.exe.tmp")
+
+    with pytest.raises(requests.RequestException):
+        cmam.fetch_to_file(server.url + "/a.exe", path, segments=4)
+    assert not os.path.exists(path)
@@ -0,0 +1,57 @@
+import hashlib
+import os
+
+import pytest
+from typer.testing import CliRunner
+
+import cmam
+
+
+@pytest.fixture
+def github(server, monkeypatch):
+    monkeypatch.setenv("CMAM_API_BASE", server.url)
+    monkeypatch.setenv("CMAM_MANIFEST_URL", server.url + "/raw/packages.json")
+    monkeypatch.setenv("CMAM_UPDATE_CHECK_TTL", str(10 ** 10))
+    server.documents["/raw/packages.json"] = {"a": {"link": "o/a", "dependencies": ["x.dll"]}}
+    return server
+
+
+def install(*args):
+    result = CliRunner().invoke(cmam.app, ["install", "a", *args])
+    assert result.exit_code == 0, result.output
+
+
+def test_install_records_the_published_digests(github):
+    github.add_release("o/a", "v1.0.0", {"a.exe": b"A" * 100, "x.dll": b"X" * 10})
+    install()
+
+    records = cmam.load_file_records("a")["a"]
+    assert [(r["name"], r["role"], r["size"]) for r in records] == [("a.exe", "primary", 100), ("x.dll", "dependency", 10)]
+    assert records[0]["digest"] == "sha256:" + hashlib.sha256(b"A" * 100).hexdigest()
+    assert records[1]["digest"] == "sha256:" + hashlib.sha256(b"X" * 10).hexdigest()
+
+
+def test_releases_without_digests_are_recorded_unverified(github):
+    github.add_release("o/a", "v1.0.0", {"a.exe": b"A" * 100, "x.dll": b"X" * 10}, digests=False)
+    install()
+
+    records = cmam.load_file_records("a")["a"]
+    assert [r["digest"] for r in records] == [None, None]
+    assert cmam.recorded_file_digests(records) is None
+
+
+def test_verify_checks_the_install_record_without_the_network(github):
+    github.add_release("o/a", "v1.0.0", {"a.exe": b"A" * 100, "x.dll": b"X" * 10})
+    install()
+    requests_before = len(github.requests)
+
+    result = CliRunner().invoke(cmam.app, ["--offline", "verify", "a"])
+    assert result.exit_code == 0, result.output
+    assert "install" in result.output and "record" in result.output
+
+    with open(os.path.join(cmam.CMAM_SCRIPTS, "x.dll"), "wb") as f:
+        f.write(b"Y" * 10)
+    result = CliRunner().invoke(cmam.app, ["--offline", "verify", "a"])
+    assert result.exit_code == 1
+    assert "x.dll does not match" in result.output
+    assert len(github.requests) == requests_before
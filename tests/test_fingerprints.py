@@ -0,0 +1,72 @@
+import os
+
+import pytest
+from typer.testing import CliRunner
+
+import cmam
+
+
+@pytest.fixture
+def hashes(monkeypatch):
+    """Paths hashed by calculate_file_checksum, in order."""
+    hashed = []
+    calculate = cmam.calculate_file_checksum
+
+    def spy(path):
+        hashed.append(path)
+        return calculate(path)
+
+    monkeypatch.setattr(cmam, "calculate_file_checksum", spy)
+    return hashed
+
+
+def write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def test_unchanged_files_are_not_rehashed(cmam_home, hashes):
+    path = os.path.join(cmam_home, "a.exe")
+    write(path, b"a" * 100)
+
+    first = cmam.cached_file_checksum(path)
+    assert cmam.cached_file_checksum(path) == first
+    assert hashes == [path]
+    assert cmam.cached_file_checksum(path, deep=True) == first
+    assert hashes == [path, path]
+
+
+def test_changed_files_are_rehashed(cmam_home, hashes):
+    path = os.path.join(cmam_home, "a.exe")
+    write(path, b"a" * 100)
+    first = cmam.cached_file_checksum(path)
+
+    write(path, b"b" * 101)
+    assert cmam.cached_file_checksum(path) != first
+    assert len(hashes) == 2
+
+
+def test_fingerprints_of_removed_files_are_pruned(cmam_home):
+    paths = [os.path.join(cmam_home, name) for name in ("a.exe", "b.exe")]
+    for path in paths:
+        write(path, b"x")
+    assert set(cmam.hash_files(paths + [os.path.join(cmam_home, "missing.exe")])) == set(paths)
+
+    os.remove(paths[0])
+    assert cmam.prune_file_fingerprints() == 1
+    assert cmam.prune_file_fingerprints() == 0
+
+
+def test_trust_rehashes_unless_fast(server, monkeypatch):
+    monkeypatch.setenv("CMAM_API_BASE", server.url)
+    monkeypatch.setenv("CMAM_MANIFEST_URL", server.url + "/raw/packages.json")
+    monkeypatch.setenv("CMAM_UPDATE_CHECK_TTL", str(10 ** 10))
+    server.documents["/raw/packages.json"] = {"a": {"link": "o/a"}}
+    server.add_release("o/a", "v1.0.0", {"a.exe": b"A" * 100})
+    assert CliRunner().invoke(cmam.app, ["install", "a"]).exit_code == 0
+
+    # A stale fingerprint for an unchanged file is only noticed by a rehash
+    path = os.path.normcase(os.path.abspath(os.path.join(cmam.CMAM_SCRIPTS, "a.exe")))
+    cmam.get_registry().execute("UPDATE fingerprints SET digest = 'sha256:stale' WHERE path = ?", (path,))
+    assert "✅ Trusted" not in CliRunner().invoke(cmam.app, ["trust", "--fast"]).output
+    assert "✅ Trusted" in CliRunner().invoke(cmam.app, ["trust"]).output
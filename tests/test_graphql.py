@@ -0,0 +1,70 @@
+import re
+
+import pytest
+
+import cmam
+
+REPOSITORY = re.compile(r'(r\d+): repository\(owner: "([^"]+)", name: "([^"]+)"\) \{ (?:release\(tagName: "([^"]+)"\)|latestRelease)')
+
+
+@pytest.fixture
+def github(server, monkeypatch):
+    """The fake server, answering release queries from its REST documents."""
+    monkeypatch.setenv("CMAM_API_BASE", server.url)
+    monkeypatch.setenv("CMAM_METADATA_BACKEND", "graphql")
+    server.queries = []
+
+    def resolve(query):
+        server.queries.append(query)
+        if "__type" in query:
+            return {"__type": {"fields": [{"name": name} for name in server.asset_fields]}}
+        data = {}
+        for alias, owner, name, tag in REPOSITORY.findall(query):
+            release = server.documents.get(f"/repos/{owner}/{name}/releases/" + (f"tags/{tag}" if tag else "latest"))
+            data[alias] = {("release" if tag else "latestRelease"): release and {
+                "tagName": release["tag_name"],
+                "releaseAssets": {"nodes": [
+                    {"name": a["name"], "downloadUrl": a["browser_download_url"], "digest": a["digest"], "size": a["size"]}
+                    for a in release["assets"]
+                ]},
+            }}
+        return data
+
+    server.graphql = resolve
+    server.asset_fields = ["name", "downloadUrl", "digest", "size"]
+    return server
+
+
+def rest_requests(server):
+    return [path for path, headers in server.requests if path != "/graphql"]
+
+
+def test_lookups_are_batched(github, monkeypatch):
+    monkeypatch.setenv("CMAM_GRAPHQL_BATCH_SIZE", "2")
+    releases = [github.add_release(f"o/{name}", "v1.0.0", {f"{name}.exe": name.encode()}) for name in "abc"]
+
+    results = cmam.fetch_release_infos([("o/a", None), ("o/b", "1.0.0"), ("o/c", None), ("o/missing", None)])
+    assert results == [(release, None) for release in releases] + [(None, None)]
+    # One introspection probe, then two batches of two
+    assert len(github.queries) == 3
+    assert rest_requests(github) == []
+
+
+def test_endpoints_without_asset_digests_use_rest(github):
+    github.asset_fields = ["name", "downloadUrl", "size"]
+    release = github.add_release("o/a", "v1.0.0", {"a.exe": b"a"})
+
+    assert cmam.fetch_release_infos([("o/a", None)]) == [(release, None)]
+    assert cmam.fetch_release_infos([("o/a", None)]) == [(release, None)]
+    # The probe runs once per process
+    assert len(github.queries) == 1
+    assert rest_requests(github) == ["/repos/o/a/releases/latest", "/repos/o/a/releases/latest"]
+
+
+def test_failed_batches_fall_back_to_rest(github):
+    release = github.add_release("o/a", "v1.0.0", {"a.exe": b"a"})
+    probe = github.graphql
+    github.graphql = lambda query: probe(query) if "__type" in query else None
+
+    assert cmam.fetch_release_infos([("o/a", None)]) == [(release, None)]
+    assert rest_requests(github) == ["/repos/o/a/releases/latest"]
@@ -0,0 +1,36 @@
+import os
+
+import cmam
+
+
+def test_cached_documents_are_revalidated_with_their_etag(server):
+    url = server.url + "/repos/o/a/releases/latest"
+    server.documents["/repos/o/a/releases/latest"] = {"tag_name": "v1.0.0"}
+
+    assert cmam.fetch_json_cached(url) == {"tag_name": "v1.0.0"}
+    assert cmam.fetch_json_cached(url) == {"tag_name": "v1.0.0"}
+    first, second = [headers for path, headers in server.requests]
+    assert "If-None-Match" not in first
+    assert second["If-None-Match"]
+
+    server.documents["/repos/o/a/releases/latest"] = {"tag_name": "v1.1.0"}
+    assert cmam.fetch_json_cached(url) == {"tag_name": "v1.1.0"}
+
+
+def test_fresh_copies_are_reused_without_a_request(server):
+    server.respond("/raw/packages.json", 200, {"Cache-Control": "max-age=600"}, b'{"a": {}}')
+    url = server.url + "/raw/packages.json"
+
+    assert cmam.fetch_json_cached(url) == {"a": {}}
+    assert cmam.fetch_json_cached(url) == {"a": {}}
+    assert len(server.requests) == 1
+
+
+def test_uncacheable_responses_are_not_stored(server):
+    server.respond("/a", 200, {"ETag": '"x"', "Cache-Control": "no-store"}, b"{}")
+    server.respond("/b", 200, {}, b"{}")
+
+    cmam.fetch_json_cached(server.url + "/a")
+    cmam.fetch_json_cached(server.url + "/b")
+    assert not os.path.exists(cmam.http_cache_path(server.url + "/a"))
+    assert not os.path.exists(cmam.http_cache_path(server.url + "/b"))
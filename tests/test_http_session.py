@@ -0,0 +1,21 @@
+import os
+
+import cmam
+
+
+def test_requests_share_one_keep_alive_connection(server, monkeypatch):
+    monkeypatch.setenv("CMAM_API_BASE", server.url)
+    server.respond("/repos/o/a/releases/latest", 200, {}, b'{"tag_name": "v1.0.0", "assets": []}')
+    server.files["/o/a/releases/download/v1.0.0/a.exe"] = b"a" * 1000
+
+    assert cmam.fetch_release_info("o/a")["tag_name"] == "v1.0.0"
+    path = os.path.join(cmam.CMAM_ROOT, "a.exe")
+    cmam.fetch_to_file(server.url + "/o/a/releases/download/v1.0.0/a.exe", path, segments=1)
+    cmam.api_request("GET", cmam.api_url("/repos/o/a/releases/latest"))
+
+    assert len(server.requests) == 3
+    assert len(server.clients) == 1
+
+
+def test_session_is_created_once():
+    assert cmam.get_http_session() is cmam.get_http_session()
@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+import requests
+
+import cmam
+
+
+@pytest.fixture
+def upstream(server, monkeypatch):
+    monkeypatch.setenv("CMAM_API_BASE", server.url)
+    monkeypatch.setenv("CMAM_MANIFEST_URL", server.url + "/raw/packages.json")
+    server.documents["/raw/packages.json"] = {"a": {"link": "o/a"}}
+    server.add_release("o/a", "v1.0.0", {"a.exe": b"A" * 5000})
+    return server
+
+
+@pytest.fixture
+def mirror():
+    servers = []
+
+    def start(**options):
+        httpd = cmam.start_mirror_server("127.0.0.1", 0, **options)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        servers.append(httpd)
+        return f"http://127.0.0.1:{httpd.server_port}"
+
+    yield start
+    for httpd in servers:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_cache_only_misses_are_503(upstream, mirror):
+    url = mirror()
+    assert requests.get(url + "/repos/o/a/releases/latest").status_code == 503
+
+
+def test_upstream_failures_are_502_and_missing_releases_404(upstream, mirror, monkeypatch):
+    monkeypatch.setenv("CMAM_MAX_RETRIES", "0")
+    url = mirror(fill=True)
+    upstream.respond("/repos/o/b/releases/latest", 500)
+    assert requests.get(url + "/repos/o/b/releases/latest").status_code == 502
+    assert requests.get(url + "/repos/o/c/releases/latest").status_code == 404
+
+
+def test_fill_serves_metadata_and_ranged_assets(upstream, mirror):
+    url = mirror(fill=True)
+    release = requests.get(url + "/repos/o/a/releases/latest").json()
+    assert release["tag_name"] == "v1.0.0"
+    assert requests.get(url + "/raw/packages.json").json() == {"a": {"link": "o/a"}}
+
+    asset = url + "/o/a/releases/download/v1.0.0/a.exe"
+    assert requests.get(asset).content == b"A" * 5000
+    response = requests.get(asset, headers={"Range": "bytes=4990-"})
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == "bytes 4990-4999/5000"
+    assert response.content == b"A" * 10
+    assert requests.get(asset, headers={"Range": "bytes=6000-"}).status_code == 416
+
+
+def test_only_release_metadata_is_proxied(upstream, mirror):
+    url = mirror(fill=True)
+    upstream.documents["/repos/o/private/contents/secret"] = {"content": "x"}
+    assert requests.get(url + "/repos/o/private/contents/secret").status_code == 404
+    assert requests.get(url + "/repos/o/a/releases/latest?per_page=1").status_code == 404
+    assert all(path != "/repos/o/private/contents/secret" for path, headers in upstream.requests)
+
+
+@pytest.mark.parametrize("use_token", [False, True])
+def test_fill_sends_the_token_only_when_asked(upstream, mirror, monkeypatch, use_token):
+    monkeypatch.setenv("GITHUB_TOKEN", "operator-token")
+    # The stand-in is plain http; treat it like api.github.com for this test
+    monkeypatch.setattr(cmam, "sends_github_token", lambda url: True)
+    url = mirror(fill=True, use_token=use_token)
+
+    assert requests.get(url + "/repos/o/a/releases/latest").status_code == 200
+    headers = [headers for path, headers in upstream.requests if path == "/repos/o/a/releases/latest"][-1]
+    assert ("Authorization" in headers) == use_token
@@ -0,0 +1,61 @@
+import pytest
+import requests
+from typer.testing import CliRunner
+
+import cmam
+
+
+@pytest.fixture
+def github(server, monkeypatch):
+    monkeypatch.setenv("CMAM_API_BASE", server.url)
+    monkeypatch.setenv("CMAM_MANIFEST_URL", server.url + "/raw/packages.json")
+    server.documents["/raw/packages.json"] = {"a": {"link": "o/a"}}
+    server.add_release("o/a", "v1.0.0", {"a.exe": b"a"})
+    return server
+
+
+def take_down(server, monkeypatch):
+    server.httpd.shutdown()
+    server.httpd.server_close()
+    # Drop the pooled keep-alive connection so the next request has to reconnect
+    monkeypatch.setattr(cmam, "_http_session", None)
+    monkeypatch.setenv("CMAM_MAX_RETRIES", "0")
+
+
+def test_cached_copy_is_used_when_the_network_is_down(github, monkeypatch, capsys):
+    url = cmam.release_api_url("o/a")
+    release = cmam.fetch_json_cached(url)
+    take_down(github, monkeypatch)
+
+    assert cmam.fetch_json_cached(url) == release
+    assert "Offline: using cached data" in capsys.readouterr().out
+    # Background refreshes must not pass stale data off as fresh
+    with pytest.raises(requests.ConnectionError):
+        cmam.fetch_json_cached(url, background=True)
+
+
+def test_offline_mode_never_touches_the_network(github, monkeypatch):
+    monkeypatch.setenv("CMAM_OFFLINE", "1")
+    with pytest.raises(cmam.OfflineError):
+        cmam.fetch_json_cached(cmam.release_api_url("o/a"))
+    with pytest.raises(cmam.OfflineError):
+        cmam.http_get(github.url + "/o/a/releases/download/v1.0.0/a.exe")
+    assert github.requests == []
+
+
+def test_info_works_offline_from_the_cache(github, monkeypatch):
+    # Keep the CMAM self-update check out of the request count
+    monkeypatch.setenv("CMAM_UPDATE_CHECK_TTL", str(10 ** 10))
+    assert CliRunner().invoke(cmam.app, ["info", "a"]).exit_code == 0
+    requests_before = len(github.requests)
+
+    result = CliRunner().invoke(cmam.app, ["--offline", "info", "a"])
+    assert result.exit_code == 0, result.output
+    assert "1.0.0" in result.output
+    assert len(github.requests) == requests_before
+
+
+def test_offline_without_a_cached_manifest_fails_clearly(github):
+    result = CliRunner().invoke(cmam.app, ["--offline", "info", "a"])
+    assert result.exit_code == 1
+    assert "No cached manifest" in result.output
@@ -0,0 +1,74 @@
+import hashlib
+import io
+import os
+import threading
+
+import pytest
+
+import cmam
+
+
+class FullDisk(io.BytesIO):
+    """A file that fails once more than `room` bytes have been written."""
+
+    def __init__(self, room):
+        super().__init__()
+        self.room = room
+
+    def write(self, data):
+        if self.tell() + len(data) > self.room:
+            raise OSError(28, "No space left on device")
+        return super().write(data)
+
+
+class BrokenHash:
+    def update(self, data):
+        raise ValueError("hash failed")
+
+
+def copy(server, f, sha256=None):
+    """copy_response on a thread, so a deadlocked pipeline fails the test instead of hanging it."""
+    outcome = {}
+
+    def run():
+        try:
+            with cmam.http_get(server.url + "/a.exe", stream=True) as r:
+                outcome["copied"] = cmam.copy_response(r, f, 0, sha256=sha256)
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout=30)
+    assert not thread.is_alive(), "copy_response did not return"
+    return outcome
+
+
+@pytest.fixture
+def source(server, monkeypatch):
+    monkeypatch.setenv("CMAM_DOWNLOAD_BUFFER_SIZE", str(64 << 10))
+    server.files["/a.exe"] = os.urandom(8 << 20)
+    return server
+
+
+@pytest.mark.parametrize("depth", ["0", "4"])
+def test_pipeline_copies_and_hashes_every_byte(source, monkeypatch, depth):
+    monkeypatch.setenv("CMAM_DOWNLOAD_PIPELINE_DEPTH", depth)
+    f, sha256 = io.BytesIO(), hashlib.sha256()
+
+    assert copy(source, f, sha256) == {"copied": 8 << 20}
+    assert f.getvalue() == source.files["/a.exe"]
+    assert sha256.hexdigest() == hashlib.sha256(source.files["/a.exe"]).hexdigest()
+
+
+@pytest.mark.parametrize("depth", ["0", "4"])
+def test_write_failures_reach_the_caller(source, monkeypatch, depth):
+    monkeypatch.setenv("CMAM_DOWNLOAD_PIPELINE_DEPTH", depth)
+    outcome = copy(source, FullDisk(1 << 20), hashlib.sha256())
+    assert isinstance(outcome.get("error"), OSError)
+
+
+def test_hash_failures_reach_the_caller(source, monkeypatch):
+    monkeypatch.setenv("CMAM_DOWNLOAD_PIPELINE_DEPTH", "4")
+    outcome = copy(source, io.BytesIO(), BrokenHash())
+    assert isinstance(outcome.get("error"), ValueError)
@@ -0,0 +1,41 @@
+import json
+import os
+
+import pytest
+from typer.testing import CliRunner
+
+import cmam
+
+
+@pytest.fixture
+def github(server, monkeypatch):
+    monkeypatch.setenv("CMAM_API_BASE", server.url)
+    monkeypatch.setenv("CMAM_MANIFEST_URL", server.url + "/raw/packages.json")
+    server.documents["/raw/packages.json"] = {"a": {"link": "o/a"}}
+    return server
+
+
+def test_prefetched_updates_apply_without_the_network(github):
+    github.add_release("o/a", "v1.0.0", {"a.exe": b"old"}, latest=False)
+    github.add_release("o/a", "v1.1.0", {"a.exe": b"new"})
+    os.makedirs(cmam.CMAM_SCRIPTS, exist_ok=True)
+    with open(os.path.join(cmam.CMAM_SCRIPTS, "a.exe"), "wb") as f:
+        f.write(b"old")
+    cmam.record_package("a", "1.0.0", cmam.package_files("a", []))
+
+    result = CliRunner().invoke(cmam.app, ["prefetch"])
+    assert result.exit_code == 0, result.output
+    with open(cmam.CMAM_PREFETCH_JSON) as f:
+        state = json.load(f)
+    assert state["complete"] and set(state["updates"]) == {"a"}
+    # The staging folder is gone, so none of its files may be left in the fingerprint cache
+    paths = [row[0] for row in cmam.get_registry().execute("SELECT path FROM fingerprints")]
+    assert all(os.path.dirname(path) == cmam.CMAM_SCRIPTS for path in paths)
+
+    requests_before = len(github.requests)
+    result = CliRunner().invoke(cmam.app, ["update-all", "--yes"])
+    assert result.exit_code == 0, result.output
+    assert len(github.requests) == requests_before
+    with open(os.path.join(cmam.CMAM_SCRIPTS, "a.exe"), "rb") as f:
+        assert f.read() == b"new"
+    assert cmam.load_local_packages()["a"]["version"] == "1.1.0"
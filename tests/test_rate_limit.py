@@ -0,0 +1,79 @@
+import time
+
+import pytest
+from typer.testing import CliRunner
+
+import cmam
+
+
+def budget(remaining, resource="core"):
+    return {
+        "X-RateLimit-Limit": "60",
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(int(time.time()) + 600),
+        "X-RateLimit-Resource": resource,
+    }
+
+
+@pytest.fixture
+def api(server, monkeypatch):
+    monkeypatch.setenv("CMAM_API_BASE", server.url)
+    return server
+
+
+def test_exhausted_budget_fails_without_a_request(api):
+    api.respond("/repos/o/a", 200, budget(0))
+    cmam.api_request("GET", cmam.api_url("/repos/o/a"))
+
+    with pytest.raises(cmam.RateLimitError):
+        cmam.api_request("GET", cmam.api_url("/repos/o/b"))
+    assert [path for path, headers in api.requests] == ["/repos/o/a"]
+
+
+def test_background_requests_leave_the_reserve(api, monkeypatch):
+    monkeypatch.setenv("CMAM_RATE_LIMIT_RESERVE", "5")
+    api.respond("/repos/o/a", 200, budget(5))
+    cmam.api_request("GET", cmam.api_url("/repos/o/a"))
+
+    with pytest.raises(cmam.RateLimitError):
+        cmam.api_request("GET", cmam.api_url("/repos/o/a"), background=True)
+    assert cmam.api_request("GET", cmam.api_url("/repos/o/a")).status_code == 200
+
+
+def test_budgets_are_tracked_per_resource(api):
+    api.respond("/graphql", 200, budget(0, "graphql"))
+    api.respond("/repos/o/a", 200, budget(40))
+    cmam.api_request("POST", cmam.graphql_endpoint(), json={"query": "{}"})
+
+    assert cmam.api_budget_remaining("graphql") == 0
+    assert cmam.api_request("GET", cmam.api_url("/repos/o/a")).status_code == 200
+    assert cmam.api_budget_remaining() == 40
+
+
+def test_secondary_rate_limit_is_retried(api):
+    api.respond("/repos/o/a", 429, {"Retry-After": "0"})
+    api.respond("/repos/o/a", 200, budget(30))
+
+    assert cmam.api_request("GET", cmam.api_url("/repos/o/a")).status_code == 200
+    assert len(api.requests) == 2
+
+
+def test_budget_is_saved_for_the_next_process(api):
+    api.respond("/repos/o/a", 200, budget(12))
+    cmam.api_request("GET", cmam.api_url("/repos/o/a"))
+    cmam.save_rate_limit_state()
+
+    cmam._rate_limit_state = None
+    assert cmam.api_budget_remaining() == 12
+
+
+@pytest.mark.parametrize("command", [["info", "a"], ["self-update"], ["self-repair"]])
+def test_release_commands_report_an_exhausted_budget(api, monkeypatch, command):
+    monkeypatch.setenv("CMAM_MANIFEST_URL", api.url + "/raw/packages.json")
+    api.respond("/raw/packages.json", 200, {"Cache-Control": "max-age=600"}, b'{"a": {"link": "o/a"}}')
+    cmam.fetch_manifest()
+    cmam._rate_limit_state = {"core": {"limit": 60, "remaining": 0, "reset": int(time.time()) + 600}}
+
+    result = CliRunner().invoke(cmam.app, command)
+    assert result.exit_code == 1
+    assert "rate limit" in result.output
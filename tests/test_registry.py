@@ -0,0 +1,55 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+import cmam
+
+
+def test_fresh_registry_imports_packages_json():
+    with open(cmam.CMAM_PACKAGES_JSON, "w") as f:
+        json.dump({"a": {"version": "1.0.0", "dependencies": ["x.dll"]}, "b": {"version": "2.0"}}, f)
+
+    assert cmam.load_local_packages() == {"a": {"version": "1.0.0", "dependencies": ["x.dll"]}, "b": {"version": "2.0"}}
+    assert cmam.get_registry().execute("PRAGMA user_version").fetchone()[0] == len(cmam.REGISTRY_MIGRATIONS)
+
+
+def test_upgrades_a_version_1_registry():
+    db = sqlite3.connect(cmam.CMAM_REGISTRY_DB)
+    for statement in cmam.REGISTRY_MIGRATIONS[0]:
+        db.execute(statement)
+    db.execute("INSERT INTO packages VALUES ('a', '1.0', 0), ('b', '1.0', 0)")
+    db.execute("INSERT INTO files VALUES ('a', 'a.exe', 'primary', 0, NULL, NULL, NULL), ('a', 'shared.dll', 'dependency', 1, NULL, NULL, NULL)")
+    db.execute("INSERT INTO files VALUES ('b', 'b.exe', 'primary', 0, NULL, NULL, NULL), ('b', 'Shared.dll', 'dependency', 1, NULL, NULL, NULL)")
+    db.execute("PRAGMA user_version = 1")
+    db.commit()
+    db.close()
+
+    registry = cmam.get_registry()
+    assert registry.execute("PRAGMA user_version").fetchone()[0] == len(cmam.REGISTRY_MIGRATIONS)
+    # The reference counts are backfilled from the existing rows, case-insensitively
+    assert cmam.file_ref_count("shared.dll") == 2
+    cmam.remove_package("a")
+    assert cmam.file_ref_count("SHARED.DLL") == 1
+    assert registry.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0] == 0
+
+
+def test_inner_transaction_rolls_back_alone():
+    with cmam.registry_transaction():
+        cmam.record_package("a", "1.0", cmam.package_files("a", []))
+        with pytest.raises(KeyError), cmam.registry_transaction():
+            cmam.record_package("b", "1.0", cmam.package_files("b", []))
+            raise KeyError("b")
+
+    assert set(cmam.load_local_packages()) == {"a"}
+
+
+def test_packages_json_is_exported_once_after_changes():
+    cmam.record_package("a", "1.0", cmam.package_files("a", ["x.dll"]))
+    cmam.record_package("b", "2.0", cmam.package_files("b", []))
+    assert not os.path.exists(cmam.CMAM_PACKAGES_JSON)
+
+    cmam.export_packages_json()
+    with open(cmam.CMAM_PACKAGES_JSON) as f:
+        assert json.load(f) == {"a": {"version": "1.0", "dependencies": ["x.dll"]}, "b": {"version": "2.0"}}
@@ -0,0 +1,56 @@
+import json
+import socket
+import time
+
+import pytest
+
+import cmam
+
+
+@pytest.fixture(autouse=True)
+def no_running_check(monkeypatch):
+    monkeypatch.setattr(cmam, "_update_check_thread", None)
+
+
+def saved_check():
+    with open(cmam.CMAM_UPDATE_CHECK_JSON) as f:
+        return json.load(f)
+
+
+def test_refresh_stores_the_latest_version(server, monkeypatch):
+    monkeypatch.setenv("CMAM_API_BASE", server.url)
+    server.add_release(cmam.CMAM_REPO, "v99.0.0", {})
+
+    cmam.refresh_cmam_update_check("1.0.0")
+    assert saved_check()["latest_version"] == "99.0.0"
+
+
+def test_a_hanging_api_is_not_retried_by_every_command(monkeypatch):
+    # Accepts connections but never answers
+    silent = socket.socket()
+    silent.bind(("127.0.0.1", 0))
+    silent.listen()
+    monkeypatch.setenv("CMAM_API_BASE", f"http://127.0.0.1:{silent.getsockname()[1]}")
+    try:
+        cmam.check_cmam_update()
+        thread = cmam._update_check_thread
+        assert thread is not None
+        thread.join(0.5)
+
+        check = saved_check()
+        assert time.time() - check["checked_at"] < 5
+        monkeypatch.setattr(cmam, "_update_check_thread", None)
+        cmam.check_cmam_update()
+        assert cmam._update_check_thread is None
+    finally:
+        silent.close()
+
+
+def test_failed_checks_keep_the_last_known_version(server, monkeypatch, capsys):
+    monkeypatch.setenv("CMAM_API_BASE", server.url)
+    server.respond(f"/repos/{cmam.CMAM_REPO}/releases/latest", 500)
+
+    cmam.refresh_cmam_update_check("99.0.0")
+    assert saved_check()["latest_version"] == "99.0.0"
+    cmam.check_cmam_update(refresh=False)
+    assert "v99.0.0" in capsys.readouterr().out
@@ -0,0 +1,32 @@
+import os
+
+import pytest
+from typer.testing import CliRunner
+
+import cmam
+
+
+@pytest.fixture
+def github(server, monkeypatch):
+    monkeypatch.setenv("CMAM_API_BASE", server.url)
+    monkeypatch.setenv("CMAM_MANIFEST_URL", server.url + "/raw/packages.json")
+    server.documents["/raw/packages.json"] = {"a": {"link": "o/a"}}
+    return server
+
+
+def install(name, version, files):
+    """Put files into the scripts folder and register them, primary exe first."""
+    os.makedirs(cmam.CMAM_SCRIPTS, exist_ok=True)
+    for filename, data in files.items():
+        with open(os.path.join(cmam.CMAM_SCRIPTS, filename), "wb") as f:
+            f.write(data)
+    cmam.record_package(name, version, cmam.package_files(name, [n for n in files if n != f"{name}.exe"]))
+
+
+def test_validate_reports_releases_without_assets(github):
+    github.add_release("o/a", "v1.0.0", {})
+    install("a", "1.0.0", {"a.exe": b"a"})
+
+    result = CliRunner().invoke(cmam.app, ["validate"])
+    assert result.exit_code == 0, result.output
+    assert "No checksum available" in result.output